@@ -3,10 +3,14 @@
 from __future__ import annotations
 
 import argparse
-import json
 from pathlib import Path
 from typing import Any
 
+try:  # orjson es opcional; se usa el módulo estándar si no está instalado.
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
 from .realestate import RealEstateSearchAgent, SearchCriteria, load_listings
 
 
@@ -36,8 +40,7 @@ def parse_args() -> argparse.Namespace:
 
 
 def load_criteria(path: Path) -> SearchCriteria:
-    with path.open("r", encoding="utf-8") as file:
-        data: dict[str, Any] = json.load(file)
+    data: dict[str, Any] = _json_loads(path.read_bytes())
     return SearchCriteria.from_dict(data)
 
 
@@ -2,13 +2,14 @@
 
 from __future__ import annotations
 
+import heapq
 from dataclasses import dataclass, field
-from typing import Dict, Iterable, List, Mapping, MutableMapping, Sequence
+from typing import Dict, Iterable, List, Mapping, Sequence
 
 from .data_loader import Listing
 
 
-@dataclass
+@dataclass(slots=True)
 class SearchCriteria:
     """Criterios configurables para evaluar terrenos."""
 
@@ -40,40 +41,84 @@ class SearchCriteria:
             min_m2 = max(min_m2, self.min_area_hectares * 10_000)
         return min_m2
 
+    def is_trivial(self) -> bool:
+        """Indica si los criterios no descartan ningún terreno."""
+
+        return not (
+            self.preferred_macrozones
+            or self.preferred_regions
+            or self.desired_property_types
+            or self.target_zonings
+            or self.required_services
+            or self.max_total_price is not None
+            or self.max_price_per_m2 is not None
+            or self._area_threshold_m2 > 0
+        )
+
+    def compile(self) -> _CompiledCriteria:
+        """Precalcula los filtros normalizados para evaluar muchos terrenos."""
+
+        def lowered(values: Sequence[str]) -> frozenset[str] | None:
+            return frozenset(value.lower() for value in values) if values else None
+
+        return _CompiledCriteria(
+            regions_lc=lowered(self.preferred_regions),
+            macrozones_lc=lowered(self.preferred_macrozones),
+            zonings_lc=lowered(self.target_zonings),
+            types_lc=lowered(self.desired_property_types),
+            required_lc=frozenset(service.lower() for service in self.required_services),
+            preferred_lc=frozenset(service.lower() for service in self.preferred_services),
+            min_area_m2=self._area_threshold_m2,
+            max_total_price=self.max_total_price,
+            max_price_per_m2=self.max_price_per_m2,
+        )
+
     def matches(self, listing: Listing) -> bool:
         """Valida si un terreno cumple los filtros mínimos."""
 
-        if self.preferred_macrozones:
-            macrozones = {zone.lower() for zone in self.preferred_macrozones}
-            if listing.macrozone.lower() not in macrozones:
-                return False
-        if self.preferred_regions:
-            regions = {region.lower() for region in self.preferred_regions}
-            if listing.region.lower() not in regions:
-                return False
-        if self.desired_property_types:
-            types = {ptype.lower() for ptype in self.desired_property_types}
-            if listing.property_type.lower() not in types:
-                return False
-        if self.target_zonings:
-            zonings = {zoning.lower() for zoning in self.target_zonings}
-            if listing.zoning.lower() not in zonings:
-                return False
-        min_area = self._area_threshold_m2
-        if listing.area_m2 < min_area:
-            return False
-        if self.max_total_price is not None and listing.total_price > self.max_total_price:
-            return False
-        if self.max_price_per_m2 is not None and listing.price_per_m2 > self.max_price_per_m2:
+        return _matches_compiled(listing, self.compile())
+
+
+@dataclass(frozen=True, slots=True)
+class _CompiledCriteria:
+    """Criterios normalizados una sola vez por búsqueda.
+
+    Los conjuntos categóricos valen ``None`` cuando el filtro no aplica.
+    """
+
+    regions_lc: frozenset[str] | None
+    macrozones_lc: frozenset[str] | None
+    zonings_lc: frozenset[str] | None
+    types_lc: frozenset[str] | None
+    required_lc: frozenset[str]
+    preferred_lc: frozenset[str]
+    min_area_m2: float
+    max_total_price: float | None
+    max_price_per_m2: float | None
+
+
+def _matches_compiled(listing: Listing, compiled: _CompiledCriteria) -> bool:
+    """Valida un terreno contra criterios ya compilados."""
+
+    categorical = (
+        (compiled.macrozones_lc, listing.macrozone),
+        (compiled.regions_lc, listing.region),
+        (compiled.types_lc, listing.property_type),
+        (compiled.zonings_lc, listing.zoning),
+    )
+    for allowed, value in categorical:
+        if allowed is not None and value.lower() not in allowed:
             return False
-        services = set(service.lower() for service in listing.services)
-        for service in self.required_services:
-            if service.lower() not in services:
-                return False
-        return True
+    if listing.area_m2 < compiled.min_area_m2:
+        return False
+    if compiled.max_total_price is not None and listing.total_price > compiled.max_total_price:
+        return False
+    if compiled.max_price_per_m2 is not None and listing.price_per_m2 > compiled.max_price_per_m2:
+        return False
+    return compiled.required_lc <= listing.services_lower
 
 
-@dataclass
+@dataclass(slots=True)
 class SearchResult:
     """Resultado de evaluación de un terreno."""
 
@@ -89,118 +134,255 @@ class RealEstateSearchAgent:
     def __init__(self, listings: Iterable[Listing]):
         self._listings = list(listings)
 
+        # Representación columnar (struct-of-arrays) construida una sola vez
+        # para evaluar filtros y puntajes sin recorrer objetos en cada búsqueda.
+        self._areas = [listing.area_m2 for listing in self._listings]
+        self._prices_m2 = [listing.price_per_m2 for listing in self._listings]
+        self._total_prices = [listing.total_price for listing in self._listings]
+        self._region_codes, self._region_vocab = _factorize(
+            listing.region for listing in self._listings
+        )
+        self._macrozone_codes, self._macrozone_vocab = _factorize(
+            listing.macrozone for listing in self._listings
+        )
+        self._property_type_codes, self._property_type_vocab = _factorize(
+            listing.property_type for listing in self._listings
+        )
+        self._zoning_codes, self._zoning_vocab = _factorize(
+            listing.zoning for listing in self._listings
+        )
+        # Vocabularios en minúsculas, en el orden de los filtros de _CompiledCriteria.
+        self._categorical_lc = (
+            (self._macrozone_codes, [name.lower() for name in self._macrozone_vocab]),
+            (self._region_codes, [name.lower() for name in self._region_vocab]),
+            (self._property_type_codes, [name.lower() for name in self._property_type_vocab]),
+            (self._zoning_codes, [name.lower() for name in self._zoning_vocab]),
+        )
+        self._service_bits: Dict[str, int] = {}
+        for listing in self._listings:
+            for service in listing.services_lower:
+                self._service_bits.setdefault(service, 1 << len(self._service_bits))
+        self._service_masks = [
+            self._services_mask(listing.services_lower) for listing in self._listings
+        ]
+        self._mode_columns: Dict[str, List[float]] = {}
+
     def search(self, criteria: SearchCriteria, top_n: int = 5) -> List[SearchResult]:
         """Retorna los mejores terrenos ordenados por calificación."""
 
+        compiled = criteria.compile()
+        # Máscaras de servicios de la búsqueda: se calculan una vez y se comparan
+        # contra la máscara de cada terreno con un AND y un conteo de bits.
+        required_mask = self._services_mask(compiled.required_lc)
+        preferred_mask = self._services_mask(compiled.preferred_lc)
+        if criteria.is_trivial():
+            candidates = list(range(len(self._listings)))
+        else:
+            candidates = self._filter_indices(compiled, required_mask)
+        scores, components = self._score_indices(
+            candidates, criteria, compiled, required_mask, preferred_mask
+        )
+
+        # Selección parcial O(N log K): solo se ordenan los K mejores y solo
+        # para ellos se arma el desglose y los indicadores a mostrar.
+        ranking = heapq.nlargest(top_n, range(len(candidates)), key=scores.__getitem__)
         results: List[SearchResult] = []
-        for listing in self._listings:
-            if not criteria.matches(listing):
+        for position in ranking:
+            listing = self._listings[candidates[position]]
+            breakdown = {name: column[position] for name, column in components.items()}
+            highlights = self._highlights(listing, criteria, compiled)
+            results.append(SearchResult(listing, scores[position], breakdown, highlights))
+        return results
+
+    def _services_mask(self, services: Iterable[str]) -> int:
+        """Codifica servicios (en minúsculas) como máscara de bits."""
+
+        mask = 0
+        for service in services:
+            mask |= self._service_bits.get(service, 0)
+        return mask
+
+    def _filter_indices(self, compiled: _CompiledCriteria, required_mask: int) -> List[int]:
+        """Aplica los filtros mínimos sobre las columnas y retorna los índices válidos."""
+
+        indices: Iterable[int] = range(len(self._listings))
+
+        wanted = (
+            compiled.macrozones_lc,
+            compiled.regions_lc,
+            compiled.types_lc,
+            compiled.zonings_lc,
+        )
+        for wanted_lc, (codes, vocab_lc) in zip(wanted, self._categorical_lc):
+            if wanted_lc is None:
                 continue
-            score, breakdown, highlights = self._score_listing(listing, criteria)
-            results.append(SearchResult(listing, score, breakdown, highlights))
-
-        results.sort(key=lambda result: result.score, reverse=True)
-        return results[:top_n]
-
-    def _score_listing(
-        self, listing: Listing, criteria: SearchCriteria
-    ) -> tuple[float, MutableMapping[str, float], MutableMapping[str, object]]:
-        breakdown: MutableMapping[str, float] = {}
-        highlights: MutableMapping[str, object] = {}
-        score = 0.0
-
-        # Ubicación
-        highlights["region"] = listing.region
-        highlights["macrozona"] = listing.macrozone
-
+            # Tabla booleana indexada por código: una sola lectura por terreno.
+            allowed = [name in wanted_lc for name in vocab_lc]
+            if not any(allowed):
+                return []
+            indices = [i for i in indices if allowed[codes[i]]]
+
+        min_area, areas = compiled.min_area_m2, self._areas
+        indices = [i for i in indices if areas[i] >= min_area]
+        if compiled.max_total_price is not None:
+            max_total, totals = compiled.max_total_price, self._total_prices
+            indices = [i for i in indices if totals[i] <= max_total]
+        if compiled.max_price_per_m2 is not None:
+            max_m2, prices = compiled.max_price_per_m2, self._prices_m2
+            indices = [i for i in indices if prices[i] <= max_m2]
+
+        if compiled.required_lc:
+            # Un servicio requerido que ningún terreno ofrece no tiene bit asignado.
+            if required_mask.bit_count() < len(compiled.required_lc):
+                return []
+            masks = self._service_masks
+            indices = [i for i in indices if masks[i] & required_mask == required_mask]
+        return list(indices)
+
+    def _score_indices(
+        self,
+        indices: Sequence[int],
+        criteria: SearchCriteria,
+        compiled: _CompiledCriteria,
+        required_mask: int,
+        preferred_mask: int,
+    ) -> tuple[List[float], Dict[str, List[float]]]:
+        """Calcula el puntaje de cada índice operando columna por columna.
+
+        Retorna los puntajes totales y cada componente del desglose por separado.
+        """
+
+        # Ubicación: el valor depende solo del código de región o macrozona.
         if criteria.preferred_regions:
-            if listing.region in criteria.preferred_regions:
-                value = 1.0
-                highlights["ubicacion"] = "Región preferida"
-            else:
-                value = 0.4
-                highlights["ubicacion"] = "Región alternativa"
+            table = [
+                1.0 if name in criteria.preferred_regions else 0.4 for name in self._region_vocab
+            ]
+            codes = self._region_codes
         elif criteria.preferred_macrozones:
-            if listing.macrozone in criteria.preferred_macrozones:
-                value = 0.9
-                highlights["ubicacion"] = "Macrozona preferida"
-            else:
-                value = 0.5
-                highlights["ubicacion"] = "Macrozona alternativa"
+            table = [
+                0.9 if name in criteria.preferred_macrozones else 0.5
+                for name in self._macrozone_vocab
+            ]
+            codes = self._macrozone_codes
         else:
-            value = 0.7
-            highlights["ubicacion"] = "Sin preferencia"
-        breakdown["ubicación"] = value * 0.25
-        score += breakdown["ubicación"]
+            table = [0.7]
+            codes = [0] * len(self._listings)
+        location = [table[codes[i]] * 0.25 for i in indices]
 
         # Servicios
-        services = {service.lower() for service in listing.services}
-        required = {service.lower() for service in criteria.required_services}
-        preferred = {service.lower() for service in criteria.preferred_services}
-        if required:
-            coverage = len(required & services) / len(required)
+        masks = self._service_masks
+        required_count = len(compiled.required_lc)
+        preferred_count = len(compiled.preferred_lc)
+        if required_count:
+            coverage = [
+                (masks[i] & required_mask).bit_count() / required_count for i in indices
+            ]
+        else:
+            coverage = [1.0] * len(indices)
+        if preferred_count:
+            preferred_scores = [
+                (masks[i] & preferred_mask).bit_count() / preferred_count for i in indices
+            ]
         else:
-            coverage = 1.0
-        preferred_score = (len(preferred & services) / len(preferred)) if preferred else 0.5
-        services_score = 0.4 * (0.6 * coverage + 0.4 * preferred_score)
-        breakdown["servicios"] = services_score
-        score += services_score
-        highlights["servicios_cubiertos"] = sorted(required & services)
-        highlights["servicios_preferidos"] = sorted(preferred & services)
+            preferred_scores = [0.5] * len(indices)
+        services = [
+            0.4 * (0.6 * cov + 0.4 * pref) for cov, pref in zip(coverage, preferred_scores)
+        ]
 
         # Precio
-        price_weight = 0.2
         if criteria.max_total_price:
-            ratio = listing.total_price / criteria.max_total_price
-            price_component = max(0.0, 1.0 - min(ratio, 1.5))
+            max_total, totals = criteria.max_total_price, self._total_prices
+            price = [max(0.0, 1.0 - min(totals[i] / max_total, 1.5)) for i in indices]
         else:
-            price_component = 0.6
+            price = [0.6] * len(indices)
         if criteria.max_price_per_m2:
-            ratio_m2 = listing.price_per_m2 / criteria.max_price_per_m2
-            price_component = (price_component + max(0.0, 1.0 - min(ratio_m2, 1.5))) / 2
-        breakdown["precio"] = price_component * price_weight
-        score += breakdown["precio"]
-        highlights["precio_total_clp"] = round(listing.total_price, 2)
-        highlights["precio_m2_clp"] = listing.price_per_m2
+            max_m2, prices = criteria.max_price_per_m2, self._prices_m2
+            price = [
+                (component + max(0.0, 1.0 - min(prices[i] / max_m2, 1.5))) / 2
+                for component, i in zip(price, indices)
+            ]
+        price = [component * 0.2 for component in price]
 
         # Transporte y conectividad
-        transport_score = self._transport_score(listing, criteria.transport_importance)
-        breakdown["conectividad"] = transport_score * 0.15
-        score += breakdown["conectividad"]
-        highlights["transporte"] = listing.transport
-
-        # Superficie
-        area_ratio = listing.area_m2 / max(criteria._area_threshold_m2, 1)
-        area_score = min(area_ratio / 4, 1.0)  # saturación si supera 4x el mínimo
-        breakdown["superficie"] = area_score * 0.2
-        score += breakdown["superficie"]
-        highlights["area_m2"] = listing.area_m2
-        highlights["area_ha"] = listing.area_m2 / 10_000
+        importance = criteria.transport_importance
+        if importance:
+            total = float(sum(importance.values())) or 1.0
+            transport = [0.0] * len(indices)
+            for mode, value in importance.items():
+                weight = value / total
+                column = self._mode_column(mode)
+                transport = [acc + weight * column[i] for acc, i in zip(transport, indices)]
+        else:
+            transport = [0.6] * len(indices)
+        transport = [value * 0.15 for value in transport]
+
+        # Superficie (saturación si supera 4x el mínimo)
+        min_area = max(compiled.min_area_m2, 1)
+        areas = self._areas
+        area = [min(areas[i] / min_area / 4, 1.0) * 0.2 for i in indices]
+
+        scores = [
+            loc + serv + pri + tra + are
+            for loc, serv, pri, tra, are in zip(location, services, price, transport, area)
+        ]
+        components = {
+            "ubicación": location,
+            "servicios": services,
+            "precio": price,
+            "conectividad": transport,
+            "superficie": area,
+        }
+        return scores, components
+
+    def _mode_column(self, mode: str) -> List[float]:
+        """Disponibilidad de un modo de transporte para todos los terrenos."""
 
-        return score, breakdown, highlights
+        mode = mode.lower()
+        column = self._mode_columns.get(mode)
+        if column is None:
+            column = [
+                self._mode_availability(mode, listing.transport) for listing in self._listings
+            ]
+            self._mode_columns[mode] = column
+        return column
 
     @staticmethod
-    def _transport_score(
-        listing: Listing, importance: Mapping[str, float]
-    ) -> float:
-        if not importance:
-            return 0.6
-
-        normalized: Dict[str, float] = {}
-        total = float(sum(importance.values())) or 1.0
-        for key, value in importance.items():
-            normalized[key] = value / total
-
-        score = 0.0
-        data = listing.transport
-        for mode, weight in normalized.items():
-            availability = RealEstateSearchAgent._mode_availability(mode, data)
-            score += weight * availability
-        return score
+    def _highlights(
+        listing: Listing, criteria: SearchCriteria, compiled: _CompiledCriteria
+    ) -> Dict[str, object]:
+        """Indicadores a mostrar para un terreno seleccionado."""
+
+        if criteria.preferred_regions:
+            if listing.region in criteria.preferred_regions:
+                location = "Región preferida"
+            else:
+                location = "Región alternativa"
+        elif criteria.preferred_macrozones:
+            if listing.macrozone in criteria.preferred_macrozones:
+                location = "Macrozona preferida"
+            else:
+                location = "Macrozona alternativa"
+        else:
+            location = "Sin preferencia"
+
+        services = listing.services_lower
+        return {
+            "region": listing.region,
+            "macrozona": listing.macrozone,
+            "ubicacion": location,
+            "servicios_cubiertos": sorted(compiled.required_lc & services),
+            "servicios_preferidos": sorted(compiled.preferred_lc & services),
+            "precio_total_clp": round(listing.total_price, 2),
+            "precio_m2_clp": listing.price_per_m2,
+            "transporte": listing.transport,
+            "area_m2": listing.area_m2,
+            "area_ha": listing.area_m2 / 10_000,
+        }
 
     @staticmethod
     def _mode_availability(mode: str, data: Mapping[str, object]) -> float:
-        mode = mode.lower()
+        """Disponibilidad de un modo (ya en minúsculas) según los datos de transporte."""
+
         if mode == "carretera":
             distance = data.get("distancia_km")
             if isinstance(distance, (int, float)):
@@ -217,3 +399,11 @@ class RealEstateSearchAgent:
                 return max(0.0, 1.0 - min(distance / 50.0, 1.0))
             return 0.0
         return 0.5 if data.get(mode) else 0.0
+
+
+def _factorize(values: Iterable[str]) -> tuple[List[int], List[str]]:
+    """Codifica valores categóricos como enteros densos."""
+
+    vocab: Dict[str, int] = {}
+    codes = [vocab.setdefault(value, len(vocab)) for value in values]
+    return codes, list(vocab)
@@ -2,11 +2,24 @@
 
 from __future__ import annotations
 
-import json
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, List, Sequence
+from typing import Iterable, List, Sequence, Tuple
 
+try:  # orjson es opcional; acelera la lectura de inventarios grandes.
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+try:  # ijson es opcional; permite leer inventarios muy grandes por partes.
+    import ijson
+except ImportError:
+    ijson = None
+
+# Sobre este tamaño (y con ijson instalado) el inventario se lee en streaming
+# para no mantener en memoria la lista completa de diccionarios.
+STREAMING_THRESHOLD_BYTES = 10 * 1024 * 1024
 
 MACROZONE_BY_REGION = {
     "Arica y Parinacota": "Norte Grande",
@@ -34,7 +47,7 @@ MACROZONE_BY_REGION = {
 }
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Listing:
     """Representa un terreno disponible dentro de Chile."""
 
@@ -53,31 +66,42 @@ class Listing:
     topography: str
     notes: str = ""
     url: str = ""
+    services_lower: frozenset[str] = field(init=False, repr=False, compare=False)
+    total_price: float = field(init=False, repr=False, compare=False)
+    macrozone: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Campos derivados: se calculan una sola vez al construir el terreno
+        # en lugar de recalcularse en cada acceso durante las búsquedas.
+        object.__setattr__(
+            self, "services_lower", frozenset(service.lower() for service in self.services)
+        )
+        object.__setattr__(self, "total_price", self.area_m2 * self.price_per_m2)
+        object.__setattr__(
+            self, "macrozone", MACROZONE_BY_REGION.get(self.region, "Zona Desconocida")
+        )
 
-    @property
-    def total_price(self) -> float:
-        """Calcula el precio total del terreno."""
-
-        return self.area_m2 * self.price_per_m2
 
-    @property
-    def macrozone(self) -> str:
-        """Obtiene la macrozona chilena asociada a la región del terreno."""
-
-        return MACROZONE_BY_REGION.get(self.region, "Zona Desconocida")
+def load_listings(path: Path | str) -> List[Listing]:
+    """Carga un conjunto de terrenos desde un archivo JSON.
 
+    El archivo se interpreta una sola vez mientras no cambie su fecha de
+    modificación ni su tamaño; las llamadas siguientes reutilizan los terrenos.
+    """
 
-def load_listings(path: Path | str) -> List[Listing]:
-    """Carga un conjunto de terrenos desde un archivo JSON."""
+    raw_path = Path(path).resolve()
+    stat = raw_path.stat()
+    return list(_load_listings_cached(str(raw_path), stat.st_mtime_ns, stat.st_size))
 
-    raw_path = Path(path)
-    with raw_path.open("r", encoding="utf-8") as file:
-        data = json.load(file)
 
-    listings: List[Listing] = []
-    for item in data:
-        listings.append(Listing(**item))
-    return listings
+@lru_cache(maxsize=8)
+def _load_listings_cached(path: str, mtime_ns: int, size: int) -> Tuple[Listing, ...]:
+    # mtime_ns forma parte de la llave solo para invalidar el caché.
+    if ijson is not None and size > STREAMING_THRESHOLD_BYTES:
+        with open(path, "rb") as file:
+            return tuple(Listing(**item) for item in ijson.items(file, "item", use_float=True))
+    data = _json_loads(Path(path).read_bytes())
+    return tuple(Listing(**item) for item in data)
 
 
 def listings_from_iterable(rows: Iterable[dict]) -> List[Listing]:
@@ -4,11 +4,14 @@ from __future__ import annotations
 
 import argparse
 import html
+import re
 import socket
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, Tuple
+from typing import Mapping, Tuple
+from socketserver import ThreadingMixIn
 from urllib.parse import parse_qs
-from wsgiref.simple_server import make_server
+from wsgiref.simple_server import WSGIServer, make_server
 
 from .realestate import RealEstateSearchAgent, SearchCriteria, load_listings
 
@@ -17,37 +20,39 @@ DEFAULT_LISTINGS_PATH = BASE_DIR / "data" / "sample_listings.json"
 
 
 def _initialize_agent(listings_path: Path | None = None) -> Tuple[
-    RealEstateSearchAgent, list[str], list[str], list[str]
+    RealEstateSearchAgent, tuple[str, ...], tuple[str, ...], tuple[str, ...]
 ]:
     """Crea el agente y catálogos auxiliares."""
 
     target_path = (listings_path or DEFAULT_LISTINGS_PATH).expanduser().resolve()
     listings = load_listings(target_path)
     agent = RealEstateSearchAgent(listings)
-    macrozones = sorted({listing.macrozone for listing in listings})
-    regions = sorted({listing.region for listing in listings})
-    property_types = sorted({listing.property_type for listing in listings})
-    return agent, macrozones, regions, property_types
+    macrozones: set[str] = set()
+    regions: set[str] = set()
+    property_types: set[str] = set()
+    for listing in listings:
+        macrozones.add(listing.macrozone)
+        regions.add(listing.region)
+        property_types.add(listing.property_type)
+    return agent, tuple(sorted(macrozones)), tuple(sorted(regions)), tuple(sorted(property_types))
 
 
 AGENT, MACROZONES, REGIONS, PROPERTY_TYPES = _initialize_agent()
 
 
+_WHITESPACE_RE = re.compile(r"[\s\u00a0]+")
+
+
 def _parse_float(value: str | None) -> float | None:
-    if value is None:
-        return None
-    value = value.strip()
     if not value:
         return None
-    normalized = (
-        value.replace("\u00a0", "")
-        .replace(" ", "")
-        .replace(".", "")
-        .replace(",", ".")
-    )
-    if normalized.count(".") > 1:
-        # si todavía hay múltiples separadores, preferimos el original para evitar ValueError
-        normalized = normalized.replace(".", "", normalized.count(".") - 1)
+    normalized = _WHITESPACE_RE.sub("", value)
+    if "," in normalized:
+        # formato chileno: punto como separador de miles y coma decimal
+        normalized = normalized.replace(".", "").replace(",", ".")
+    elif normalized.count(".") > 1:
+        # varios puntos sin coma solo pueden ser separadores de miles
+        normalized = normalized.replace(".", "")
     try:
         return float(normalized)
     except ValueError:
@@ -61,42 +66,48 @@ def _split_csv(raw: str | None) -> list[str]:
     return [segment.strip() for segment in parts if segment.strip()]
 
 
-def _build_criteria(params: dict[str, list[str]]) -> SearchCriteria:
+def _form_values(params: dict[str, list[str]]) -> dict[str, str]:
+    """Reduce el resultado de ``parse_qs`` al primer valor de cada campo."""
+
+    return {key: values[0] for key, values in params.items() if values}
+
+
+def _build_criteria(form: Mapping[str, str]) -> SearchCriteria:
     kwargs: dict[str, object] = {}
 
-    macrozona = params.get("macrozona", [""])[0].strip()
+    macrozona = form.get("macrozona", "").strip()
     if macrozona:
         kwargs["preferred_macrozones"] = [macrozona]
 
-    region = params.get("region", [""])[0].strip()
+    region = form.get("region", "").strip()
     if region:
         kwargs["preferred_regions"] = [region]
 
-    property_type = params.get("property_type", [""])[0].strip()
+    property_type = form.get("property_type", "").strip()
     if property_type:
         kwargs["desired_property_types"] = [property_type]
 
-    min_area = _parse_float(params.get("min_area", [""])[0])
-    area_unit = params.get("area_unit", ["m2"])[0]
+    min_area = _parse_float(form.get("min_area"))
+    area_unit = form.get("area_unit", "m2")
     if min_area is not None and min_area > 0:
         if area_unit == "ha":
             kwargs["min_area_hectares"] = min_area
         else:
             kwargs["min_area_m2"] = min_area
 
-    required_services = _split_csv(params.get("required_services", [""])[0])
+    required_services = _split_csv(form.get("required_services"))
     if required_services:
         kwargs["required_services"] = required_services
 
-    preferred_services = _split_csv(params.get("preferred_services", [""])[0])
+    preferred_services = _split_csv(form.get("preferred_services"))
     if preferred_services:
         kwargs["preferred_services"] = preferred_services
 
-    max_price = _parse_float(params.get("max_price", [""])[0])
+    max_price = _parse_float(form.get("max_price"))
     if max_price is not None and max_price > 0:
         kwargs["max_total_price"] = max_price
 
-    max_price_m2 = _parse_float(params.get("max_price_m2", [""])[0])
+    max_price_m2 = _parse_float(form.get("max_price_m2"))
     if max_price_m2 is not None and max_price_m2 > 0:
         kwargs["max_price_per_m2"] = max_price_m2
 
@@ -107,110 +118,140 @@ def _format_currency(value: float) -> str:
     return f"$ {value:,.0f}".replace(",", ".")
 
 
-def _render_options(values: Iterable[str], selected: str) -> str:
+@lru_cache(maxsize=256)
+def _render_options(safe_values: tuple[str, ...], selected: str) -> str:
+    """Genera las opciones de un ``<select>`` a partir de valores ya escapados."""
+
+    safe_selected = html.escape(selected)
     options = ["<option value=''>Todas</option>"]
-    for value in values:
-        safe_value = html.escape(value)
-        if value == selected:
+    for safe_value in safe_values:
+        if safe_value == safe_selected:
             options.append(f"<option value=\"{safe_value}\" selected>{safe_value}</option>")
         else:
             options.append(f"<option value=\"{safe_value}\">{safe_value}</option>")
     return "\n".join(options)
 
 
-def _render_results(results) -> str:
-    if not results:
-        return "<p>No se encontraron terrenos que cumplan los criterios.</p>"
+def _prepare_option_catalogs() -> None:
+    """Escapa los catálogos una sola vez y deja en caché las listas sin selección."""
 
-    rows: list[str] = []
-    for result in results:
-        listing = result.listing
-        highlights = result.highlights
-        url = listing.url.strip()
-        if url:
-            link = f'<a href="{html.escape(url)}" target="_blank" rel="noopener">Ver publicación</a>'
-        else:
-            link = "<span>Sin enlace</span>"
-        rows.append(
-            """
+    global SAFE_MACROZONES, SAFE_REGIONS, SAFE_PROPERTY_TYPES
+
+    SAFE_MACROZONES = tuple(html.escape(value) for value in MACROZONES)
+    SAFE_REGIONS = tuple(html.escape(value) for value in REGIONS)
+    SAFE_PROPERTY_TYPES = tuple(html.escape(value) for value in PROPERTY_TYPES)
+    for safe_values in (SAFE_MACROZONES, SAFE_REGIONS, SAFE_PROPERTY_TYPES):
+        _render_options(safe_values, "")
+
+
+_prepare_option_catalogs()
+
+
+def _render_row(result) -> str:
+    listing = result.listing
+    highlights = result.highlights
+    url = listing.url.strip()
+    if url:
+        link = f'<a href="{html.escape(url)}" target="_blank" rel="noopener">Ver publicación</a>'
+    else:
+        link = "<span>Sin enlace</span>"
+    name = html.escape(listing.name)
+    commune = html.escape(listing.commune)
+    region = html.escape(listing.region)
+    area_m2 = highlights.get("area_m2", listing.area_m2)
+    area_ha = highlights.get("area_ha", listing.area_m2 / 10_000)
+    total = html.escape(_format_currency(highlights.get("precio_total_clp", listing.total_price)))
+    per_m2 = html.escape(_format_currency(highlights.get("precio_m2_clp", listing.price_per_m2)))
+    return f"""
             <tr>
                 <td><strong>{name}</strong><br><small>{commune}, {region}</small></td>
                 <td>{area_m2:.0f} m²<br>{area_ha:.2f} ha</td>
                 <td>{total} CLP<br><small>{per_m2} CLP/m²</small></td>
-                <td>{score:.3f}</td>
+                <td>{result.score:.3f}</td>
                 <td>{link}</td>
             </tr>
-            """.format(
-                name=html.escape(listing.name),
-                commune=html.escape(listing.commune),
-                region=html.escape(listing.region),
-                area_m2=highlights.get("area_m2", listing.area_m2),
-                area_ha=highlights.get("area_ha", listing.area_m2 / 10_000),
-                total=html.escape(_format_currency(highlights.get("precio_total_clp", listing.total_price))),
-                per_m2=html.escape(_format_currency(highlights.get("precio_m2_clp", listing.price_per_m2))),
-                score=result.score,
-                link=link,
-            )
-        )
+            """
+
 
+def _render_results(results) -> str:
+    if not results:
+        return "<p>No se encontraron terrenos que cumplan los criterios.</p>"
+
+    rows = "".join(_render_row(result) for result in results)
     return (
         "<table class=\"results\">"
         "<thead><tr><th>Terreno</th><th>Superficie</th><th>Precio</th><th>Score</th><th>Publicación</th></tr></thead>"
-        f"<tbody>{''.join(rows)}</tbody></table>"
+        f"<tbody>{rows}</tbody></table>"
     )
 
 
-def _render_page(params: dict[str, list[str]], results_html: str, top: int) -> str:
-    selected_macrozona = params.get("macrozona", [""])[0]
-    selected_region = params.get("region", [""])[0]
-    selected_property = params.get("property_type", [""])[0]
-    min_area_value = params.get("min_area", [""])[0]
-    area_unit = params.get("area_unit", ["m2"])[0]
-    required_services = params.get("required_services", [""])[0]
-    preferred_services = params.get("preferred_services", [""])[0]
-    max_price = params.get("max_price", [""])[0]
-    max_price_m2 = params.get("max_price_m2", [""])[0]
-    top_value = params.get("top", [str(top)])[0]
-
-    return f"""
+# Fragmentos estáticos de la página: se construyen (y codifican en UTF-8) una
+# sola vez al importar el módulo; cada respuesta solo codifica la parte dinámica.
+_PAGE_HEAD = """
     <!DOCTYPE html>
-    <html lang=\"es\">
+    <html lang="es">
     <head>
-        <meta charset=\"utf-8\">
+        <meta charset="utf-8">
         <title>Buscador de Terrenos</title>
         <style>
-            body {{ font-family: 'Segoe UI', Arial, sans-serif; margin: 2rem; background: #f5f6f8; }}
-            h1 {{ color: #243447; }}
-            form {{ background: #fff; padding: 1.5rem; border-radius: 8px; box-shadow: 0 2px 6px rgba(0,0,0,0.08); margin-bottom: 2rem; }}
-            fieldset {{ border: none; padding: 0; margin: 0 0 1rem 0; display: grid; grid-template-columns: repeat(auto-fit, minmax(220px, 1fr)); gap: 1rem; }}
-            label {{ display: flex; flex-direction: column; font-weight: 600; color: #33475b; font-size: 0.9rem; }}
-            input, select {{ margin-top: 0.4rem; padding: 0.5rem; border: 1px solid #cbd6e2; border-radius: 4px; font-size: 0.95rem; }}
-            button {{ background: #2b7cff; color: #fff; border: none; padding: 0.75rem 1.5rem; border-radius: 4px; font-size: 1rem; cursor: pointer; }}
-            button:hover {{ background: #1f5fd6; }}
-            table.results {{ width: 100%; border-collapse: collapse; background: #fff; box-shadow: 0 2px 4px rgba(0,0,0,0.05); border-radius: 8px; overflow: hidden; }}
-            table.results th, table.results td {{ padding: 0.9rem; border-bottom: 1px solid #e6ecf1; text-align: left; }}
-            table.results th {{ background: #f0f4f8; color: #243447; }}
-            table.results tr:last-child td {{ border-bottom: none; }}
-            @media (max-width: 768px) {{ fieldset {{ grid-template-columns: 1fr; }} }}
+            body { font-family: 'Segoe UI', Arial, sans-serif; margin: 2rem; background: #f5f6f8; }
+            h1 { color: #243447; }
+            form { background: #fff; padding: 1.5rem; border-radius: 8px; box-shadow: 0 2px 6px rgba(0,0,0,0.08); margin-bottom: 2rem; }
+            fieldset { border: none; padding: 0; margin: 0 0 1rem 0; display: grid; grid-template-columns: repeat(auto-fit, minmax(220px, 1fr)); gap: 1rem; }
+            label { display: flex; flex-direction: column; font-weight: 600; color: #33475b; font-size: 0.9rem; }
+            input, select { margin-top: 0.4rem; padding: 0.5rem; border: 1px solid #cbd6e2; border-radius: 4px; font-size: 0.95rem; }
+            button { background: #2b7cff; color: #fff; border: none; padding: 0.75rem 1.5rem; border-radius: 4px; font-size: 1rem; cursor: pointer; }
+            button:hover { background: #1f5fd6; }
+            table.results { width: 100%; border-collapse: collapse; background: #fff; box-shadow: 0 2px 4px rgba(0,0,0,0.05); border-radius: 8px; overflow: hidden; }
+            table.results th, table.results td { padding: 0.9rem; border-bottom: 1px solid #e6ecf1; text-align: left; }
+            table.results th { background: #f0f4f8; color: #243447; }
+            table.results tr:last-child td { border-bottom: none; }
+            @media (max-width: 768px) { fieldset { grid-template-columns: 1fr; } }
         </style>
     </head>
     <body>
         <h1>Buscador de terrenos en Chile</h1>
-        <form method=\"get\">
+        <form method="get">
+""".encode("utf-8")
+
+_FORM_TAIL = """
+            <button type="submit">Buscar terrenos</button>
+        </form>
+""".encode("utf-8")
+
+_PAGE_TAIL = """
+    </body>
+    </html>
+    """.encode("utf-8")
+
+
+def _render_page(form: Mapping[str, str], results_html: str, top: int) -> bytes:
+    selected_macrozona = form.get("macrozona", "")
+    selected_region = form.get("region", "")
+    selected_property = form.get("property_type", "")
+    min_area_value = form.get("min_area", "")
+    area_unit = form.get("area_unit", "m2")
+    required_services = form.get("required_services", "")
+    preferred_services = form.get("preferred_services", "")
+    max_price = form.get("max_price", "")
+    max_price_m2 = form.get("max_price_m2", "")
+    top_value = form.get("top", str(top))
+
+    form_html = f"""
             <fieldset>
                 <label>Macrozona
                     <select name=\"macrozona\">
-                        {_render_options(MACROZONES, selected_macrozona)}
+                        {_render_options(SAFE_MACROZONES, selected_macrozona)}
                     </select>
                 </label>
                 <label>Región
                     <select name=\"region\">
-                        {_render_options(REGIONS, selected_region)}
+                        {_render_options(SAFE_REGIONS, selected_region)}
                     </select>
                 </label>
                 <label>Tipo de propiedad
                     <select name=\"property_type\">
-                        {_render_options(PROPERTY_TYPES, selected_property)}
+                        {_render_options(SAFE_PROPERTY_TYPES, selected_property)}
                     </select>
                 </label>
                 <label>Superficie mínima
@@ -238,28 +279,30 @@ def _render_page(params: dict[str, list[str]], results_html: str, top: int) -> s
                     <input type=\"number\" step=\"1\" min=\"1\" name=\"top\" value=\"{html.escape(top_value)}\">
                 </label>
             </fieldset>
-            <button type=\"submit\">Buscar terrenos</button>
-        </form>
-        {results_html}
-    </body>
-    </html>
-    """
+"""
+    return b"".join(
+        (
+            _PAGE_HEAD,
+            form_html.encode("utf-8"),
+            _FORM_TAIL,
+            results_html.encode("utf-8"),
+            _PAGE_TAIL,
+        )
+    )
 
 
 def application(environ, start_response):
-    params = parse_qs(environ.get("QUERY_STRING", ""))
-    top_param = params.get("top", ["5"])[0]
+    form = _form_values(parse_qs(environ.get("QUERY_STRING", "")))
     try:
-        top = max(1, int(top_param))
+        top = max(1, int(form.get("top", "5")))
     except ValueError:
         top = 5
 
-    criteria = _build_criteria(params) if params else SearchCriteria()
+    criteria = _build_criteria(form) if form else SearchCriteria()
     results = AGENT.search(criteria, top_n=top)
 
     results_html = _render_results(results)
-    page = _render_page(params, results_html, top)
-    body = page.encode("utf-8")
+    body = _render_page(form, results_html, top)
 
     start_response(
         "200 OK",
@@ -271,13 +314,25 @@ def application(environ, start_response):
     return [body]
 
 
-def _discover_local_urls(host: str, port: int) -> list[str]:
-    urls = set()
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """Servidor WSGI que atiende cada petición en un hilo propio.
+
+    El agente y los catálogos no se modifican tras la carga, por lo que las
+    búsquedas pueden ejecutarse en paralelo sin bloquear a otros clientes.
+    """
+
+    daemon_threads = True
+
+
+@lru_cache(maxsize=8)
+def _discover_local_urls(host: str, port: int) -> tuple[str, ...]:
+    """Direcciones desde las que se puede abrir el servidor (se calculan una vez)."""
 
     if host not in {"0.0.0.0", "::"}:
-        urls.add(f"http://{host}:{port}")
-    else:
-        urls.add(f"http://127.0.0.1:{port}")
+        # El servidor solo escucha en esa interfaz: no hace falta consultar DNS.
+        return (f"http://{host}:{port}",)
+
+    urls = {f"http://127.0.0.1:{port}"}
 
     try:
         hostname = socket.gethostname()
@@ -290,6 +345,7 @@ def _discover_local_urls(host: str, port: int) -> list[str]:
 
     try:
         with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(0.1)
             sock.connect(("8.8.8.8", 80))
             ip = sock.getsockname()[0]
             if not ip.startswith("127."):
@@ -297,7 +353,7 @@ def _discover_local_urls(host: str, port: int) -> list[str]:
     except OSError:
         pass
 
-    return sorted(urls)
+    return tuple(sorted(urls))
 
 
 def main(host: str = "0.0.0.0", port: int = 8000, listings_path: Path | None = None) -> None:
@@ -313,8 +369,9 @@ def main(host: str = "0.0.0.0", port: int = 8000, listings_path: Path | None = N
         print("No se pudo cargar el inventario de terrenos:")
         print(f"  {exc}")
         return
+    _prepare_option_catalogs()
 
-    with make_server(host, port, application) as server:
+    with make_server(host, port, application, server_class=_ThreadingWSGIServer) as server:
         urls = _discover_local_urls(host, port)
         print("Servidor web iniciado. Accede desde:")
         for url in urls: